@@ -4,11 +4,16 @@ RK3588 System Monitor - A Textual-based monitoring tool for RK3588 SoC
 Monitors temperature, CPU, memory, and NPU usage with real-time graphs
 """
 
+import asyncio
 import os
+import re
 import subprocess
-import configparser
+import sys
+import tomllib
 from collections import deque
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Deque, Dict, List, Optional, Tuple
 
 import psutil
 from textual.app import App, ComposeResult
@@ -16,71 +21,192 @@ from textual.containers import Container
 from textual.widget import Widget
 from textual.widgets import Header, Footer, Static
 
+# NPU负载输出格式: "NPU load: Core0: 0%, Core1: 0%, Core2: 0%,"，部分驱动版本带小数
+_NPU_RE = re.compile(rb'Core(\d+):\s*(\d+(?:\.\d+)?)%')
+
+# RK3588 NPU三个核心的名称，驻留后作为所有NPU字典的键，查找时可直接比较指针
+_CORE_NAMES = tuple(sys.intern(f"Core{i}") for i in range(3))
+
+
+# 正常/警告/严重三级状态对应的显示颜色
+_COLORS = ("green", "yellow", "red")
+
+
+def make_classifier(warning: float, critical: float) -> Callable[[float], str]:
+    """生成按警告/严重阈值返回颜色的函数"""
+    def classify(value: float) -> str:
+        return _COLORS[(value > warning) + (value > critical)]
+    
+    return classify
+
+
+@dataclass(slots=True)
+class Thresholds:
+    """配置快照: 刷新循环中用到的类型化配置值，以及由阈值预先生成的颜色分类函数"""
+    
+    temp_warn: float
+    temp_crit: float
+    cpu_warn: float
+    cpu_crit: float
+    mem_warn: float
+    mem_crit: float
+    npu_warn: float
+    npu_crit: float
+    enable_temp: bool
+    enable_npu: bool
+    show_graphs: bool
+    display_mode: str
+    history_length: int
+    update_interval: float
+    temp_update_interval: float
+    show_trends: bool = field(init=False)
+    classify_temp: Callable[[float], str] = field(init=False, repr=False)
+    classify_cpu: Callable[[float], str] = field(init=False, repr=False)
+    classify_mem: Callable[[float], str] = field(init=False, repr=False)
+    classify_npu: Callable[[float], str] = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.show_trends = self.display_mode == 'trend' and self.show_graphs
+        self.classify_temp = make_classifier(self.temp_warn, self.temp_crit)
+        self.classify_cpu = make_classifier(self.cpu_warn, self.cpu_crit)
+        self.classify_mem = make_classifier(self.mem_warn, self.mem_crit)
+        self.classify_npu = make_classifier(self.npu_warn, self.npu_crit)
+
+
+@dataclass(slots=True)
+class SystemSnapshot:
+    """一次快速采样得到的CPU、内存和NPU数据 (温度单独按较慢的间隔采样)"""
+    
+    cpu_percent: float
+    memory_percent: float
+    memory_used_mb: int
+    npu_loads: Dict[str, float]
+
 
 class Config:
     """配置管理类"""
     
     def __init__(self, config_file: str = "config.toml"):
         self.config_file = config_file
-        self.config = configparser.ConfigParser()
+        self.values: Dict[Tuple[str, str], object] = {}
         self.load_config()
     
     def load_config(self):
         """加载配置文件"""
         # 设置默认值
-        self.config.read_dict({
+        defaults = {
             'monitor': {
-                'update_interval': '1.0',
-                'history_length': '60',
-                'temp_warning_threshold': '60.0',
-                'temp_critical_threshold': '70.0',
-                'cpu_warning_threshold': '70.0',
-                'cpu_critical_threshold': '90.0',
-                'memory_warning_threshold': '80.0',
-                'memory_critical_threshold': '95.0',
-                'npu_warning_threshold': '70.0',
-                'npu_critical_threshold': '90.0'
+                'update_interval': 1.0,
+                'temp_update_interval': 5.0,
+                'history_length': 60,
+                'temp_warning_threshold': 60.0,
+                'temp_critical_threshold': 70.0,
+                'cpu_warning_threshold': 70.0,
+                'cpu_critical_threshold': 90.0,
+                'memory_warning_threshold': 80.0,
+                'memory_critical_threshold': 95.0,
+                'npu_warning_threshold': 70.0,
+                'npu_critical_threshold': 90.0
             },
             'display': {
-                'graph_width': '20',
-                'use_colors': 'true',
-                'show_history_graphs': 'true'
+                'graph_width': 20,
+                'use_colors': True,
+                'show_history_graphs': True,
+                'display_mode': 'trend'
             },
             'sensors': {
-                'enable_temperature': 'true',
-                'enable_npu': 'true'
+                'enable_temperature': True,
+                'enable_npu': True
             }
-        })
+        }
+        self.values = {
+            (section, key): value
+            for section, options in defaults.items()
+            for key, value in options.items()
+        }
         
-        # 如果配置文件存在，则读取
+        # 如果配置文件存在，则按TOML格式读取，并按默认值的类型转换后覆盖
         if os.path.exists(self.config_file):
             try:
-                self.config.read(self.config_file)
+                with open(self.config_file, 'rb') as f:
+                    user_config = tomllib.load(f)
             except Exception as e:
                 print(f"警告: 无法读取配置文件 {self.config_file}: {e}")
+                return
+            
+            for section, options in user_config.items():
+                if not isinstance(options, dict):
+                    continue
+                for key, value in options.items():
+                    default = self.values.get((section, key))
+                    try:
+                        self.values[section, key] = self._coerce(value, default)
+                    except (TypeError, ValueError):
+                        print(f"警告: 配置项 [{section}] {key} 的值无效: {value!r}，使用默认值 {default!r}")
+    
+    @staticmethod
+    def _coerce(value: object, default: object) -> object:
+        """按默认值的类型转换配置值，无法转换时抛出ValueError"""
+        if default is None:
+            return value
+        # bool("false")为True，布尔项只接受TOML的true/false；数值项也不接受布尔值
+        if isinstance(default, bool) or isinstance(value, bool):
+            if isinstance(default, bool) and isinstance(value, bool):
+                return value
+            raise ValueError(value)
+        return type(default)(value)
+    
+    def snapshot(self) -> Thresholds:
+        """生成当前配置的类型化快照，供刷新循环直接读取属性"""
+        return Thresholds(
+            temp_warn=self.get_float('monitor', 'temp_warning_threshold'),
+            temp_crit=self.get_float('monitor', 'temp_critical_threshold'),
+            cpu_warn=self.get_float('monitor', 'cpu_warning_threshold'),
+            cpu_crit=self.get_float('monitor', 'cpu_critical_threshold'),
+            mem_warn=self.get_float('monitor', 'memory_warning_threshold'),
+            mem_crit=self.get_float('monitor', 'memory_critical_threshold'),
+            npu_warn=self.get_float('monitor', 'npu_warning_threshold'),
+            npu_crit=self.get_float('monitor', 'npu_critical_threshold'),
+            enable_temp=self.get_bool('sensors', 'enable_temperature'),
+            enable_npu=self.get_bool('sensors', 'enable_npu'),
+            show_graphs=self.get_bool('display', 'show_history_graphs'),
+            display_mode=self.get_str('display', 'display_mode'),
+            history_length=self.get_int('monitor', 'history_length'),
+            update_interval=self.get_float('monitor', 'update_interval'),
+            temp_update_interval=self.get_float('monitor', 'temp_update_interval'),
+        )
     
     def get_float(self, section: str, key: str) -> float:
         """获取浮点数配置值"""
-        return self.config.getfloat(section, key)
+        return self.values[section, key]
     
     def get_int(self, section: str, key: str) -> int:
         """获取整数配置值"""
-        return self.config.getint(section, key)
+        return self.values[section, key]
     
     def get_bool(self, section: str, key: str) -> bool:
         """获取布尔配置值"""
-        return self.config.getboolean(section, key)
+        return self.values[section, key]
     
     def get_str(self, section: str, key: str) -> str:
         """获取字符串配置值"""
-        return self.config.get(section, key)
+        return self.values[section, key]
+    
+    def set(self, section: str, key: str, value: object):
+        """修改配置值（仅在当前会话中）"""
+        self.values[section, key] = value
 
 
 class ThermalZoneReader:
     """读取RK3588温度传感器数据"""
     
+    __slots__ = ('config', 'th', 'THERMAL_ZONES', '_fds', '_zones')
+    
+    THERMAL_PATH = "/sys/class/thermal/thermal_zone{}/temp"
+    
     def __init__(self, config: Config):
         self.config = config
+        self.th = config.snapshot()
         self.THERMAL_ZONES = {
             0: "SoC中心",
             1: "A76_0/1(CPU4/5)",
@@ -90,96 +216,172 @@ class ThermalZoneReader:
             5: "GPU",
             6: "NPU"
         }
-    
-    def read_temperature(self, zone: int) -> Optional[float]:
-        """读取指定温度区域的温度（摄氏度）"""
-        if not self.config.get_bool('sensors', 'enable_temperature'):
-            return None
-            
-        try:
-            thermal_path = f"/sys/class/thermal/thermal_zone{zone}/temp"
-            if os.path.exists(thermal_path):
-                with open(thermal_path, 'r') as f:
-                    temp_millidegree = int(f.read().strip())
-                    return temp_millidegree / 1000.0
-        except (FileNotFoundError, ValueError, PermissionError):
-            pass
-        return None
+        
+        # 启动时打开所有存在的温度文件，之后每次刷新只需一次pread；
+        # 温度监控关闭时不打开任何文件，单区读取自然返回None
+        self._fds: Dict[int, int] = {}
+        for zone in self.THERMAL_ZONES if self.th.enable_temp else ():
+            try:
+                self._fds[zone] = os.open(self.THERMAL_PATH.format(zone), os.O_RDONLY)
+            except OSError:
+                pass
+        
+        # 只保留实际存在的温度区域，批量读取时直接遍历
+        self._zones: List[Tuple[str, int]] = [
+            (self.THERMAL_ZONES[zone], fd) for zone, fd in self._fds.items()
+        ]
+    
+    def close(self):
+        """关闭所有温度文件描述符"""
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+        self._zones.clear()
     
     def read_all_temperatures(self) -> Dict[str, float]:
         """读取所有温度传感器数据"""
         temps = {}
-        for zone, name in self.THERMAL_ZONES.items():
-            temp = self.read_temperature(zone)
-            if temp is not None:
-                temps[name] = temp
-        return temps
-    
-    def get_temp_color(self, temp: float) -> str:
-        """根据温度返回颜色"""
-        warning_threshold = self.config.get_float('monitor', 'temp_warning_threshold')
-        critical_threshold = self.config.get_float('monitor', 'temp_critical_threshold')
+        if not self.th.enable_temp:
+            return temps
         
-        if temp > critical_threshold:
-            return "red"
-        elif temp > warning_threshold:
-            return "yellow"
-        else:
-            return "green"
+        for name, fd in self._zones:
+            try:
+                # int()可直接解析带换行的bytes，无需decode/strip
+                temps[name] = int(os.pread(fd, 32, 0)) / 1000.0
+            except (OSError, ValueError):
+                pass
+        return temps
 
 
 class NPUReader:
     """读取RK3588 NPU使用率数据"""
     
+    __slots__ = ('config', 'th', '_fd', '_sudo_available', 'permission_hint')
+    
+    LOAD_PATH = "/sys/kernel/debug/rknpu/load"
+    
     def __init__(self, config: Config):
         self.config = config
+        self.th = config.snapshot()
+        self._fd: Optional[int] = None
+        # sudo回退方式失败一次后不再重试，避免每次刷新都fork一个注定失败的进程
+        self._sudo_available = True
+        # 无权直接读取时给用户的一次性提示，由界面在挂载后显示
+        self.permission_hint: Optional[str] = None
+        
+        # 有权限时只打开一次调试文件，之后每次刷新直接读取，无需再fork sudo
+        if self.th.enable_npu:
+            try:
+                self._fd = os.open(self.LOAD_PATH, os.O_RDONLY)
+            except PermissionError:
+                self._fd = None
+                self.permission_hint = (
+                    f"无权直接读取 {self.LOAD_PATH}，本次运行将回退到 sudo -n。"
+                    "可以root运行，或通过udev规则/挂载选项让debugfs文件对当前用户组可读"
+                )
+            except OSError:
+                self._fd = None
+    
+    def close(self):
+        """关闭NPU调试文件描述符"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def parse_npu_load(self, output: bytes) -> Dict[str, float]:
+        """解析NPU负载输出，直接在bytes上匹配"""
+        # 每次返回新字典: 读取在后台线程进行，复用同一字典会与界面线程的遍历冲突
+        npu_loads = {}
+        for m in _NPU_RE.finditer(output):
+            core = int(m.group(1))
+            core_name = _CORE_NAMES[core] if core < len(_CORE_NAMES) else f"Core{core}"
+            npu_loads[core_name] = float(m.group(2))
+        return npu_loads
     
     def read_npu_load(self) -> Dict[str, float]:
-        """读取NPU负载，需要sudo权限"""
-        if not self.config.get_bool('sensors', 'enable_npu'):
-            return {"Core0": 0.0, "Core1": 0.0, "Core2": 0.0}
+        """读取NPU负载，需要root权限或sudo"""
+        if not self.th.enable_npu:
+            return dict.fromkeys(_CORE_NAMES, 0.0)
+        
+        if self._fd is not None:
+            try:
+                return self.parse_npu_load(os.pread(self._fd, 256, 0))
+            except OSError:
+                pass
+            return dict.fromkeys(_CORE_NAMES, 0.0)
+        
+        if not self._sudo_available:
+            return dict.fromkeys(_CORE_NAMES, 0.0)
             
         try:
+            # -n: 需要输入密码时直接失败，而不是在界面运行中等待终端输入
             result = subprocess.run(
-                ['sudo', 'cat', '/sys/kernel/debug/rknpu/load'],
+                ['sudo', '-n', 'cat', self.LOAD_PATH],
                 capture_output=True,
-                text=True,
                 timeout=2
             )
             
             if result.returncode == 0:
-                # 解析输出格式: "NPU load: Core0: 0%, Core1: 0%, Core2: 0%,"
-                output = result.stdout.strip()
-                npu_loads = {}
+                return self.parse_npu_load(result.stdout)
                 
-                if "NPU load:" in output:
-                    parts = output.split("NPU load:")[1].strip()
-                    for part in parts.split(','):
-                        if ':' in part:
-                            core_info = part.strip()
-                            if core_info:
-                                core_name, load_str = core_info.split(':')
-                                load_val = float(load_str.strip().rstrip('%'))
-                                npu_loads[core_name.strip()] = load_val
-                
-                return npu_loads
-                
-        except (subprocess.TimeoutExpired, subprocess.CalledProcessError, ValueError):
+        except (OSError, subprocess.TimeoutExpired):
             pass
         
-        return {"Core0": 0.0, "Core1": 0.0, "Core2": 0.0}
+        self._sudo_available = False
+        return dict.fromkeys(_CORE_NAMES, 0.0)
+
+
+class CPUStatReader:
+    """直接读取/proc/stat计算CPU总使用率"""
+    
+    __slots__ = ('_fd', '_prev_total', '_prev_idle')
+    
+    STAT_PATH = "/proc/stat"
     
-    def get_npu_color(self, load: float) -> str:
-        """根据NPU负载返回颜色"""
-        warning_threshold = self.config.get_float('monitor', 'npu_warning_threshold')
-        critical_threshold = self.config.get_float('monitor', 'npu_critical_threshold')
+    def __init__(self):
+        self._fd: Optional[int] = None
+        self._prev_total = 0
+        self._prev_idle = 0
         
-        if load > critical_threshold:
-            return "red"
-        elif load > warning_threshold:
-            return "yellow"
-        else:
-            return "green"
+        try:
+            self._fd = os.open(self.STAT_PATH, os.O_RDONLY)
+        except OSError:
+            self._fd = None
+        
+        # 先采样一次作为基准，第一次刷新即可得到有效的差值
+        self.read_cpu_percent()
+    
+    def close(self):
+        """关闭/proc/stat文件描述符"""
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def read_cpu_percent(self) -> float:
+        """返回自上次调用以来的CPU使用率，无法读取时回退到psutil"""
+        if self._fd is None:
+            return psutil.cpu_percent(interval=None)
+        
+        try:
+            # 第一行为汇总的cpu行: user nice system idle iowait irq softirq steal guest guest_nice
+            buf = os.pread(self._fd, 256, 0)
+            fields = buf[:buf.find(b'\n')].split(None, 9)
+            times = [int(x) for x in fields[1:9]]
+        except (OSError, ValueError):
+            return psutil.cpu_percent(interval=None)
+        
+        # 与psutil一致: guest时间已计入user，不重复累加；iowait视为空闲
+        total = sum(times)
+        idle = times[3] + times[4]
+        total_delta = total - self._prev_total
+        idle_delta = idle - self._prev_idle
+        self._prev_total = total
+        self._prev_idle = idle
+        
+        if total_delta <= 0:
+            return 0.0
+        busy = (total_delta - idle_delta) / total_delta * 100
+        return round(min(max(busy, 0.0), 100.0), 1)
 
 
 class GraphWidget(Widget):
@@ -191,34 +393,48 @@ class GraphWidget(Widget):
         self.data_points = deque(maxlen=max_points)
         self.max_value = 100.0
         self.min_value = 0.0
+        
+        # 数据版本号与上次渲染结果，数据未变时重绘直接复用
+        self._version = 0
+        self._rendered: Optional[Tuple[tuple, str]] = None
     
     def add_data_point(self, value: float):
-        """添加数据点"""
+        """添加数据点，仅在组件已挂载显示时才触发重绘"""
         self.data_points.append(value)
+        self._version += 1
         if value > self.max_value:
             self.max_value = value * 1.1
-        self.refresh()
+        if self.is_mounted:
+            self.refresh()
     
     def render(self) -> str:
         """渲染图形"""
         if not self.data_points:
             return f"[bold]{self.title}[/bold]\n无数据"
         
+        render_key = (self._version, self.max_value, self.min_value)
+        if self._rendered is not None and self._rendered[0] == render_key:
+            return self._rendered[1]
+        
         width = max(50, len(self.data_points))
         height = 8
         
-        # 创建图形网格
-        grid = [[' ' for _ in range(width)] for _ in range(height)]
+        # 创建图形网格: 一维列表，每行末尾带换行符，避免逐行分配列表
+        row_len = width + 1
+        grid = ([' '] * width + ['\n']) * height
+        grid.pop()
         
         # 绘制数据点
         if len(self.data_points) > 1:
+            # 归一化参数与循环无关，提前计算；width不小于数据点数，无需逐点判断越界
+            min_value = self.min_value
+            span = self.max_value - min_value
+            top = height - 1
             for i, value in enumerate(self.data_points):
-                if i < width:
-                    # 将值映射到网格高度
-                    normalized = (value - self.min_value) / (self.max_value - self.min_value) if self.max_value > self.min_value else 0
-                    y = int((1 - normalized) * (height - 1))
-                    y = max(0, min(height - 1, y))
-                    grid[y][i] = '█'
+                # 将值映射到网格高度
+                normalized = (value - min_value) / span if span > 0 else 0
+                y = int((1 - normalized) * top)
+                grid[(0 if y < 0 else top if y > top else y) * row_len + i] = '█'
         
         # 转换为字符串
         lines = []
@@ -226,181 +442,252 @@ class GraphWidget(Widget):
         lines.append(f"[bold]{self.title}[/bold] 当前: {current_val:.1f}")
         lines.append(f"最大: {self.max_value:.1f}")
         
-        for row in grid:
-            lines.append(''.join(row))
+        lines.append(''.join(grid))
         
         lines.append(f"最小: {self.min_value:.1f}")
         
-        return '\n'.join(lines)
+        text = '\n'.join(lines)
+        self._rendered = (render_key, text)
+        return text
 
 
 class SystemInfoWidget(Static):
     """系统信息显示组件"""
     
+    TEMP_HEADER = "[bold red]🌡️  芯片温度:[/bold red]"
+    NPU_HEADER = "[bold magenta]🚀 NPU使用率:[/bold magenta]"
+    
+    # 温度按重要性排序显示
+    TEMP_ORDER: Tuple[Tuple[str, str], ...] = (
+        ("SoC中心", "🔥"),
+        ("A76_0/1(CPU4/5)", "🔴"),
+        ("A76_2/3(CPU6/7)", "🔴"),
+        ("A55_0/1/2/3(CPU0-3)", "🟡"),
+        ("GPU", "🎮"),
+        ("NPU", "🧠"),
+        ("PD_CENTER", "⚙️"),
+    )
+    
     def __init__(self, config: Config, **kwargs):
         super().__init__(**kwargs)
         self.config = config
+        self.th = config.snapshot()
         self.thermal_reader = ThermalZoneReader(config)
         self.npu_reader = NPUReader(config)
+        # 构造时即完成一次基准采样，第一帧就能显示真实的CPU使用率
+        self.cpu_reader = CPUStatReader()
         
         # 历史数据存储
-        history_length = self.config.get_int('monitor', 'history_length')
+        history_length = self.th.history_length
         self.cpu_history = deque(maxlen=history_length)
         self.memory_history = deque(maxlen=history_length)
         self.temp_history = {name: deque(maxlen=history_length) for name in self.thermal_reader.THERMAL_ZONES.values()}
-        self.npu_history = {"Core0": deque(maxlen=history_length), "Core1": deque(maxlen=history_length), "Core2": deque(maxlen=history_length)}
+        self.npu_history = {core: deque(maxlen=history_length) for core in _CORE_NAMES}
+        
+        # 每行按颜色预先生成带图标和名称的模板，并直接持有该区域的历史队列，渲染时无需再按名称查找
+        self._temp_rows: List[Tuple[str, Dict[str, str], Deque[float]]] = [
+            (name, {c: f"  {icon} [{c}]{name}: {{:.1f}}°C[/{c}]" for c in _COLORS}, self.temp_history[name])
+            for name, icon in self.TEMP_ORDER
+        ]
+        
+        # 物理内存总量在运行期间不变，只在启动时计算一次
+        mem_total_mb = psutil.virtual_memory().total // 1024 // 1024
+        
+        # 按颜色预先生成每类数据行的Rich标记模板，渲染时只需填入数值
+        self._cpu_line_tpl = {c: f"[bold {c}]💻 CPU使用率: {{:.1f}}%[/bold {c}]" for c in _COLORS}
+        self._mem_line_tpl = {c: f"[bold {c}]🧠 内存使用: {{:.1f}}% ({{}}MB/{mem_total_mb}MB)[/bold {c}]" for c in _COLORS}
+        self._npu_line_tpl = {c: f"  🔹 [{c}]{{}}: {{:.1f}}%[/{c}]" for c in _COLORS}
+        self._trend_tpl = "  [dim](平均: {:.1f}% {})[/dim]"
+        self._temp_trend_tpl = "  [dim](平均: {:.1f}°C {})[/dim]"
+        
+        # 后台worker最近一次的采样结果，温度变化缓慢，单独保存最近一次读数
+        self._snapshot: Optional[SystemSnapshot] = None
+        self._temperatures: Dict[str, float] = {}
+        
+        # 手动刷新与定时采样可能同时发起，CPU差值等读取器状态不是线程安全的，采样需串行进行
+        self._sample_lock = asyncio.Lock()
+        
+        # 传感器开关运行期间不变，启动时确定要渲染的区块，未启用的区块连空行都不生成
+        self._sections: List[Callable[[List[str], SystemSnapshot, bool], None]] = [self._render_usage]
+        if self.th.enable_temp:
+            self._sections.append(self._render_temperatures)
+        if self.th.enable_npu:
+            self._sections.append(self._render_npu)
+        
+        # 上一次渲染内容的签名，数据无变化时跳过重绘
+        self._render_sig: tuple = ()
+        self._last_text = ""
     
-    def update_data(self):
-        """更新所有监控数据"""
-        # CPU使用率
-        cpu_percent = psutil.cpu_percent(interval=None)
-        self.cpu_history.append(cpu_percent)
-        
-        # 内存使用率
+    def on_mount(self) -> None:
+        """组件挂载后启动后台采样"""
+        if self.npu_reader.permission_hint:
+            self.notify(self.npu_reader.permission_hint, title="NPU监控", severity="warning", timeout=10)
+        # 快慢两组指标各用一个worker分组，exclusive只会取消同组的旧worker
+        self.run_worker(self.poll_sensors(), group="fast", exclusive=True)
+        if self.th.enable_temp:
+            self.run_worker(self.poll_temperatures(), group="slow", exclusive=True)
+    
+    async def poll_sensors(self) -> None:
+        """按更新间隔周期性采样CPU、内存和NPU并刷新显示"""
+        while True:
+            await asyncio.sleep(self.th.update_interval)
+            await self.refresh_data()
+    
+    async def poll_temperatures(self) -> None:
+        """按温度更新间隔周期性读取温度，启动时先读一次使首帧即有温度数据"""
+        while True:
+            await self.refresh_temperatures()
+            await asyncio.sleep(self.th.temp_update_interval)
+    
+    async def refresh_data(self) -> None:
+        """在后台线程中采样，避免读取延迟阻塞界面事件循环，完成后回到事件循环记录并刷新显示"""
+        async with self._sample_lock:
+            self.record(await asyncio.to_thread(self.sample))
+        self.tick()
+    
+    async def refresh_temperatures(self) -> None:
+        """在后台线程中读取温度，完成后回到事件循环记录并刷新显示"""
+        self.record_temperatures(await asyncio.to_thread(self.thermal_reader.read_all_temperatures))
+        self.tick()
+    
+    def sample(self) -> SystemSnapshot:
+        """采样CPU、内存和NPU数据 (在后台线程中运行)"""
         memory = psutil.virtual_memory()
-        self.memory_history.append(memory.percent)
-        
-        # 温度数据
-        temperatures = self.thermal_reader.read_all_temperatures()
+        return SystemSnapshot(
+            cpu_percent=self.cpu_reader.read_cpu_percent(),
+            memory_percent=memory.percent,
+            memory_used_mb=memory.used // 1024 // 1024,
+            npu_loads=self.npu_reader.read_npu_load(),
+        )
+    
+    def record_temperatures(self, temperatures: Dict[str, float]):
+        """保存最新温度读数并追加到温度历史"""
+        self._temperatures = temperatures
         for name, temp in temperatures.items():
             if name in self.temp_history:
                 self.temp_history[name].append(temp)
+    
+    def record(self, snapshot: SystemSnapshot):
+        """保存最新采样结果并追加到历史数据"""
+        self._snapshot = snapshot
+        self.cpu_history.append(snapshot.cpu_percent)
+        self.memory_history.append(snapshot.memory_percent)
         
-        # NPU使用率
-        npu_loads = self.npu_reader.read_npu_load()
-        for core, load in npu_loads.items():
+        for core, load in snapshot.npu_loads.items():
             if core in self.npu_history:
                 self.npu_history[core].append(load)
-        
-        # 更新显示
-        self.render_info()
     
-    def get_cpu_color(self, cpu_percent: float) -> str:
-        """根据CPU使用率返回颜色"""
-        warning_threshold = self.config.get_float('monitor', 'cpu_warning_threshold')
-        critical_threshold = self.config.get_float('monitor', 'cpu_critical_threshold')
-        
-        if cpu_percent > critical_threshold:
-            return "red"
-        elif cpu_percent > warning_threshold:
-            return "yellow"
-        else:
-            return "green"
+    def on_unmount(self) -> None:
+        """组件卸载时释放传感器文件描述符"""
+        self.thermal_reader.close()
+        self.npu_reader.close()
+        self.cpu_reader.close()
     
-    def get_memory_color(self, memory_percent: float) -> str:
-        """根据内存使用率返回颜色"""
-        warning_threshold = self.config.get_float('monitor', 'memory_warning_threshold')
-        critical_threshold = self.config.get_float('monitor', 'memory_critical_threshold')
-        
-        if memory_percent > critical_threshold:
-            return "red"
-        elif memory_percent > warning_threshold:
-            return "yellow"
-        else:
-            return "green"
-    
-    def get_trend_indicator(self, data: List[float]) -> str:
-        """获取趋势指示器"""
+    def get_avg_and_trend(self, data: Deque[float]) -> tuple:
+        """获取平均值和趋势"""
         if len(data) < 2:
-            return ""
+            return 0.0, ""
+        
+        # 最近5个数据点的平均值，直接从deque尾部迭代，不复制整段历史
+        avg = sum(islice(reversed(data), 5)) / min(5, len(data))
         
+        # 趋势只比较末尾两个点
         current = data[-1]
         previous = data[-2]
-        
         if current > previous + 1:
-            return "↗"
-        elif current < previous - 1:    
-            return "↘"
+            trend = "↗"
+        elif current < previous - 1:
+            trend = "↘"
         else:
-            return "→"
-    
-    def get_avg_and_trend(self, data: List[float]) -> tuple:
-        """获取平均值和趋势"""
-        if len(data) < 2:
-            return 0.0, ""
-        
-        # 最近5个数据点的平均值
-        recent_data = data[-5:]
-        avg = sum(recent_data) / len(recent_data)
-        trend = self.get_trend_indicator(data)
+            trend = "→"
         
         return avg, trend
 
-    def render_info(self):
-        """渲染系统信息"""
-        lines = []
-        display_mode = self.config.get_str('display', 'display_mode') if self.config.config.has_option('display', 'display_mode') else 'trend'
-        show_trends = display_mode == 'trend' and self.config.get_bool('display', 'show_history_graphs')
-        
-        # CPU信息
-        cpu_current = self.cpu_history[-1] if self.cpu_history else 0
-        cpu_color = self.get_cpu_color(cpu_current)
-        cpu_line = f"[bold {cpu_color}]💻 CPU使用率: {cpu_current:.1f}%[/bold {cpu_color}]"
+    def _render_usage(self, lines: List[str], snapshot: SystemSnapshot, show_trends: bool):
+        """生成CPU和内存使用率行"""
+        cpu_percent = snapshot.cpu_percent
+        cpu_line = self._cpu_line_tpl[self.th.classify_cpu(cpu_percent)].format(cpu_percent)
         
         if show_trends and len(self.cpu_history) >= 2:
-            cpu_avg, cpu_trend = self.get_avg_and_trend(list(self.cpu_history))
-            cpu_line += f"  [dim](平均: {cpu_avg:.1f}% {cpu_trend})[/dim]"
+            cpu_line += self._trend_tpl.format(*self.get_avg_and_trend(self.cpu_history))
         
         lines.append(cpu_line)
         
-        # 内存信息  
-        memory = psutil.virtual_memory()
-        memory_color = self.get_memory_color(memory.percent)
-        mem_line = f"[bold {memory_color}]🧠 内存使用: {memory.percent:.1f}% ({memory.used//1024//1024}MB/{memory.total//1024//1024}MB)[/bold {memory_color}]"
+        memory_color = self.th.classify_mem(snapshot.memory_percent)
+        mem_line = self._mem_line_tpl[memory_color].format(snapshot.memory_percent, snapshot.memory_used_mb)
         
         if show_trends and len(self.memory_history) >= 2:
-            mem_avg, mem_trend = self.get_avg_and_trend(list(self.memory_history))
-            mem_line += f"  [dim](平均: {mem_avg:.1f}% {mem_trend})[/dim]"
-            
-        lines.append(mem_line)
-        lines.append("")
-        
-        # 温度信息
-        if self.config.get_bool('sensors', 'enable_temperature'):
-            lines.append("[bold red]🌡️  芯片温度:[/bold red]")
-            temperatures = self.thermal_reader.read_all_temperatures()
-            
-            # 按重要性排序显示
-            temp_order = [
-                ("SoC中心", "🔥"),
-                ("A76_0/1(CPU4/5)", "🔴"), 
-                ("A76_2/3(CPU6/7)", "🔴"),
-                ("A55_0/1/2/3(CPU0-3)", "🟡"),
-                ("GPU", "🎮"),
-                ("NPU", "🧠"),
-                ("PD_CENTER", "⚙️")
-            ]
-            
-            for name, icon in temp_order:
-                if name in temperatures:
-                    temp = temperatures[name]
-                    color = self.thermal_reader.get_temp_color(temp)
-                    temp_line = f"  {icon} [{color}]{name}: {temp:.1f}°C[/{color}]"
-                    
-                    if show_trends and len(self.temp_history[name]) >= 2:
-                        temp_avg, temp_trend = self.get_avg_and_trend(list(self.temp_history[name]))
-                        temp_line += f"  [dim](平均: {temp_avg:.1f}°C {temp_trend})[/dim]"
-                    
-                    lines.append(temp_line)
+            mem_line += self._trend_tpl.format(*self.get_avg_and_trend(self.memory_history))
         
+        lines.append(mem_line)
+    
+    def _render_temperatures(self, lines: List[str], snapshot: SystemSnapshot, show_trends: bool):
+        """生成温度区块，温度来自单独的慢速采样"""
         lines.append("")
-        
-        # NPU信息
-        if self.config.get_bool('sensors', 'enable_npu'):
-            lines.append("[bold magenta]🚀 NPU使用率:[/bold magenta]")
-            npu_loads = self.npu_reader.read_npu_load()
-            
-            for core, load in npu_loads.items():
-                color = self.npu_reader.get_npu_color(load)
-                npu_line = f"  🔹 [{color}]{core}: {load:.1f}%[/{color}]"
+        lines.append(self.TEMP_HEADER)
+        temperatures = self._temperatures
+        # 分类函数在循环外取出，每个传感器只剩一次调用和一次元组索引
+        classify_temp = self.th.classify_temp
+        for name, line_tpl, history in self._temp_rows:
+            temp = temperatures.get(name)
+            if temp is not None:
+                temp_line = line_tpl[classify_temp(temp)].format(temp)
                 
-                if show_trends and len(self.npu_history[core]) >= 2:
-                    npu_avg, npu_trend = self.get_avg_and_trend(list(self.npu_history[core]))
-                    npu_line += f"  [dim](平均: {npu_avg:.1f}% {npu_trend})[/dim]"
+                if show_trends and len(history) >= 2:
+                    temp_line += self._temp_trend_tpl.format(*self.get_avg_and_trend(history))
                 
-                lines.append(npu_line)
+                lines.append(temp_line)
+    
+    def _render_npu(self, lines: List[str], snapshot: SystemSnapshot, show_trends: bool):
+        """生成NPU使用率区块"""
+        lines.append("")
+        lines.append(self.NPU_HEADER)
+        classify_npu = self.th.classify_npu
+        for core, load in snapshot.npu_loads.items():
+            npu_line = self._npu_line_tpl[classify_npu(load)].format(core, load)
+            
+            # 超出_CORE_NAMES的核心没有历史队列，只显示当前值
+            history = self.npu_history.get(core)
+            if show_trends and history is not None and len(history) >= 2:
+                npu_line += self._trend_tpl.format(*self.get_avg_and_trend(history))
+            
+            lines.append(npu_line)
+    
+    def tick(self):
+        """根据最近一次采样结果刷新显示"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return
         
-        self.update('\n'.join(lines))
+        # 更新显示
+        show_trends = self.th.show_trends
+        
+        # 按显示精度计算签名，与上次相同则无需重新格式化和刷新界面
+        render_sig = (
+            show_trends,
+            round(snapshot.cpu_percent, 1),
+            round(snapshot.memory_percent, 1),
+            snapshot.memory_used_mb,
+            tuple((name, round(temp, 1)) for name, temp in self._temperatures.items()),
+            tuple((core, round(load, 1)) for core, load in snapshot.npu_loads.items()),
+        )
+        if show_trends:
+            # 平均值和趋势箭头只取决于每个历史序列最近5个数据点
+            histories = (self.cpu_history, self.memory_history, *self.temp_history.values(), *self.npu_history.values())
+            render_sig += tuple(tuple(islice(reversed(history), 5)) for history in histories)
+        if render_sig == self._render_sig:
+            return
+        self._render_sig = render_sig
+        
+        lines: List[str] = []
+        for render_section in self._sections:
+            render_section(lines, snapshot, show_trends)
+        
+        # 签名变化但格式化结果相同(如数值在显示精度内波动)时同样不刷新界面
+        text = '\n'.join(lines)
+        if text != self._last_text:
+            self._last_text = text
+            self.update(text)
 
 
 class RK3588Monitor(App):
@@ -442,35 +729,38 @@ class RK3588Monitor(App):
         """应用启动时的初始化"""
         self.title = "RK3588 系统监控器"
         self.sub_title = "实时监控温度、CPU、内存、NPU"
-        
-        # 从配置获取更新间隔
-        update_interval = self.config.get_float('monitor', 'update_interval')
-        self.set_interval(update_interval, self.update_system_info)
     
     def update_system_info(self) -> None:
         """更新系统信息"""
         system_widget = self.query_one("#system_info", SystemInfoWidget)
-        system_widget.update_data()
+        system_widget.run_worker(system_widget.refresh_data())
+        if system_widget.th.enable_temp:
+            system_widget.run_worker(system_widget.refresh_temperatures())
     
     def action_refresh(self) -> None:
         """手动刷新"""
         self.update_system_info()
     
+    def apply_display_config(self) -> None:
+        """显示设置修改后重新生成配置快照并刷新"""
+        system_widget = self.query_one("#system_info", SystemInfoWidget)
+        system_widget.th = self.config.snapshot()
+        system_widget.tick()
+    
     def action_toggle_trends(self) -> None:
         """切换趋势显示"""
         current = self.config.get_bool('display', 'show_history_graphs')
         # 动态更新配置（仅在当前会话中）
-        self.config.config.set('display', 'show_history_graphs', str(not current))
-        self.update_system_info()
+        self.config.set('display', 'show_history_graphs', not current)
+        self.apply_display_config()
         mode = "开启" if not current else "关闭"
         self.notify(f"趋势显示已{mode}")
     
     def action_toggle_simple(self) -> None:
         """切换简洁模式"""
-        current_mode = self.config.get_str('display', 'display_mode') if self.config.config.has_option('display', 'display_mode') else 'trend'
-        new_mode = 'simple' if current_mode == 'trend' else 'trend'
-        self.config.config.set('display', 'display_mode', new_mode)
-        self.update_system_info()
+        new_mode = 'simple' if self.config.get_str('display', 'display_mode') == 'trend' else 'trend'
+        self.config.set('display', 'display_mode', new_mode)
+        self.apply_display_config()
         self.notify(f"切换到{'简洁' if new_mode == 'simple' else '详细'}模式")
 
 
@@ -11,7 +11,7 @@ a = Analysis(
         'textual.app',
         'textual.widgets',
         'psutil',
-        'configparser',
+        'tomllib',
         'threading',
         'time',
         'collections'